@@ -20,7 +20,7 @@ def dump_repo(
     Args:
         path_or_url: Local directory or remote repository URL.
         fmt: Output format ("text", "json" or "html").
-        **cli_kwargs: Any option accepted by :func:`render_repo`, plus
+        **cli_kwargs: Any option accepted by :func:`render_repo_iter`, plus
             ``private_token`` for remote downloads. Unknown keys raise
             TypeError (fail first — no silent typos).
 
@@ -29,7 +29,7 @@ def dump_repo(
     """
     # GUARDRAIL: this used to re-declare every option default via
     # cli_kwargs.get(...) and duplicate the collect+render call. Defaults now
-    # live ONLY in render_repo's signature; unknown cli_kwargs raise TypeError
+    # live ONLY in render_repo_iter's signature; unknown cli_kwargs raise TypeError
     # instead of being silently ignored (a typo'd option used to vanish).
     private_token = cli_kwargs.pop("private_token", None)
 
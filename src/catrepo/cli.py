@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List, cast
+from typing import Iterator, List, cast
 
 import click
 
@@ -12,7 +13,7 @@ from .downloader import download_repo
 from .renderer import (
     DEFAULT_CONTENTS_SORT,
     DEFAULT_MAX_TOKEN_SIZE_MULTIPLIER,
-    render_repo,
+    render_repo_iter,
 )
 from .walker import DEFAULT_MAX_SIZE
 
@@ -36,7 +37,8 @@ from .walker import DEFAULT_MAX_SIZE
     multiple=True,
     help=(
         "Glob(s) to exclude. Trailing '/' or '\\' expands recursively. "
-        "'.git/' is excluded by default."
+        "'.git/', 'node_modules/', venvs and tool caches are excluded by "
+        "default unless named by --include."
     ),
 )
 @click.option(
@@ -152,10 +154,11 @@ def main(
         raise click.UsageError("PATH or --remote-url required")
 
     try:
-        # GUARDRAIL: collect+render plumbing lives in renderer.render_repo (shared
-        # with the API) — the two entry points can't drift apart when options change.
-        def _render_root(root: Path) -> str:
-            return render_repo(
+        # GUARDRAIL: collect+render plumbing lives in renderer.render_repo_iter
+        # (shared with the API) — the two entry points can't drift apart when
+        # options change.
+        def _render_root(root: Path) -> Iterator[str]:
+            return render_repo_iter(
                 root,
                 include=include,
                 exclude=exclude,
@@ -171,20 +174,33 @@ def main(
                 contents_sort=contents_sort,
             )
 
-        if remote_url:
-            with download_repo(remote_url, private_token) as tmp:
-                output = _render_root(tmp)
-        else:
-            output = _render_root(cast(Path, path))
+        with ExitStack() as stack:
+            if remote_url:
+                root = stack.enter_context(download_repo(remote_url, private_token))
+            else:
+                root = cast(Path, path)
+            # GUARDRAIL: render_repo_iter collects, loads and tokenizes eagerly —
+            # those failures raise HERE, before the outfile is opened. Only the
+            # output assembly (header, tree, json/html encoding) is lazy and runs
+            # in the loop below. Chunks are streamed to every sink in one loop;
+            # the full dump string is never materialized (nor encoded in one piece).
+            chunks = _render_root(root)
+            fh = None
+            if outfile:
+                fh = stack.enter_context(
+                    outfile.open("w", encoding=encoding, errors="replace")
+                )
+            for chunk in chunks:
+                if fh is not None:
+                    fh.write(chunk)
+                if stdout:
+                    click.echo(chunk, nl=False)
+            if stdout:
+                click.echo()
     except Exception as exc:  # pragma: no cover - fatal CLI errors
         click.echo(str(exc), err=True)
         raise SystemExit(1)
 
-    if outfile:
-        outfile.write_text(output, encoding=encoding, errors="replace")
-    if stdout:
-        click.echo(output)
-
 
 if __name__ == "__main__":  # pragma: no cover
     main()
@@ -8,11 +8,11 @@ import statistics
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Iterable, Iterator, List, Optional
 
 from .analyzer import rank_files
 from .loader import load_text
-from .tokenizer import approximate_tokens
+from .tokenizer import approximate_tokens_batch
 from .tree import generate_tree_view
 from .walker import DEFAULT_MAX_SIZE, FileInfo, collect_files
 
@@ -33,7 +33,7 @@ NOISE_SUFFIXES = (".min.js", ".min.css", ".map", ".csv", ".tsv")
 
 # GUARDRAIL: these two defaults were re-declared in cli.py click decorators AND
 # api.py cli_kwargs.get(...) — three copies, silent drift. Single source of truth:
-# render_repo's signature uses them, cli.py and api.py import them.
+# render_repo_iter's signature uses them, cli.py and api.py import them.
 DEFAULT_MAX_TOKEN_SIZE_MULTIPLIER = 0.0
 DEFAULT_CONTENTS_SORT = "mtime"
 
@@ -47,25 +47,38 @@ def _is_noise_file(path: Path) -> bool:
 class FileDump:
     """A file plus its loaded contents and token count."""
 
+    __slots__ = ("path", "full_path", "size", "mtime", "tokens", "content", "loaded")
+
     def __init__(self, info: FileInfo, root: Path) -> None:
-        self.path = info.path
+        self.path = Path(info.path)
         self.full_path = root / info.path
         self.size = info.size
         # GUARDRAIL: FileDump used to throw away info.mtime, which made ordering
         # the contents section by edit recency impossible — keep it for sorting.
         self.mtime = info.mtime
+        # GUARDRAIL: tokens are filled in by Dump in ONE batch call over every
+        # loaded file (see _count_tokens) — per-file tokenization was serial.
+        # Unreadable files keep tokens = 0 and are left out of the batch.
         self.tokens = 0
         self.content = ""
+        self.loaded = False
         try:
             self.content = load_text(self.full_path)
-            self.tokens = approximate_tokens(self.content)
+            self.loaded = True
         except OSError:
             # GUARDRAIL: was `except Exception` — that silently turned real bugs
             # (typos, logic errors) into empty files. load_text handles decode errors
             # internally (errors="replace") and can only raise OSError, so catch only
             # what can actually happen — fail first on anything else.
             self.content = ""
-            self.tokens = 0
+
+
+def _count_tokens(file_dumps: List[FileDump]) -> None:
+    """Set ``tokens`` on every loaded FileDump with a single batch call."""
+    loaded = [fd for fd in file_dumps if fd.loaded]
+    counts = approximate_tokens_batch([fd.content for fd in loaded])
+    for fd, tokens in zip(loaded, counts):
+        fd.tokens = tokens
 
 
 class Dump:
@@ -84,6 +97,7 @@ class Dump:
         self.root = root
         self.files = files
         self.file_dumps: List[FileDump] = [FileDump(info, root) for info in files]
+        _count_tokens(self.file_dumps)
         self.total_tokens = sum(fd.tokens for fd in self.file_dumps)
 
         # GUARDRAIL: filter is opt-in (multiplier <= 0 = off) and pattern-aware —
@@ -106,10 +120,20 @@ class Dump:
         self._sort_contents()
 
     def _truncate(self, limit: int) -> None:
+        """Drop the largest files (ties: path, descending) until under *limit*."""
+        # GUARDRAIL: exact counts stay on EVERY file — the header total, the json
+        # per-file tokens and the pareto median all report them, so estimating
+        # most files as size//4 would silently change output. What was wasteful
+        # was pop(0) per victim (an O(n) shift each, O(n·k) total): find the cut
+        # in one pass over the ranked list and drop the victims in one slice.
         self.file_dumps.sort(key=lambda f: (f.tokens, f.path.as_posix()), reverse=True)
-        while self.total_tokens > limit and self.file_dumps:
-            victim = self.file_dumps.pop(0)
-            self.total_tokens -= victim.tokens
+        victims = 0
+        for fd in self.file_dumps:
+            if self.total_tokens <= limit:
+                break
+            self.total_tokens -= fd.tokens
+            victims += 1
+        del self.file_dumps[:victims]
 
     def _sort_contents(self) -> None:
         """Order the contents section for output.
@@ -171,7 +195,11 @@ class Dump:
                 file=sys.stderr,
             )
 
-    def as_text(self, repo_name: str) -> str:
+    # GUARDRAIL: output is produced as a stream of chunks (iter_*) so callers
+    # can write it out piece by piece — the CLI used to hold the whole joined
+    # dump string AND its encoded bytes at once. The as_* methods join the same
+    # chunks, so streamed and joined output are byte-identical.
+    def iter_text(self, repo_name: str) -> Iterator[str]:
         timestamp = datetime.now(timezone.utc).isoformat()
         lines = [f"# Catrepo dump – {repo_name} – {timestamp}"]
         lines.append(f"# ≈ {self.total_tokens} tokens")
@@ -192,15 +220,16 @@ class Dump:
         lines.append(tree_view)
         lines.append("```")
         lines.append("")
+        yield "\n".join(lines) + "\n"
 
-        # Add file contents
+        # Add file contents — one chunk per file
         for fd in self.file_dumps:
-            lines.append(f"\n### {fd.path.as_posix()}")
-            lines.append(fd.content)
-        lines.append("")
-        return "\n".join(lines)
+            yield f"\n### {fd.path.as_posix()}\n{fd.content}\n"
 
-    def as_json(self, repo_name: str) -> str:
+    def as_text(self, repo_name: str) -> str:
+        return "".join(self.iter_text(repo_name))
+
+    def iter_json(self, repo_name: str) -> Iterator[str]:
         obj = {
             "repo": repo_name,
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -214,9 +243,15 @@ class Dump:
                 for fd in self.file_dumps
             ],
         }
-        return json.dumps(obj, indent=2)
+        # GUARDRAIL: iterencode with the same options as json.dumps(obj, indent=2)
+        # — identical output. Its chunks are tiny (one per token), so they are
+        # coalesced before being handed to the writer.
+        yield from _coalesce(json.JSONEncoder(indent=2).iterencode(obj))
 
-    def as_html(self, repo_name: str) -> str:
+    def as_json(self, repo_name: str) -> str:
+        return "".join(self.iter_json(repo_name))
+
+    def iter_html(self, repo_name: str) -> Iterator[str]:
         timestamp = datetime.now(timezone.utc).isoformat()
         # GUARDRAIL: the ~60-line CSS block is a module-level _HTML_STYLE constant
         # (moved verbatim — html output must stay byte-identical).
@@ -236,9 +271,10 @@ class Dump:
             f"<p>{timestamp} · ≈ {self.total_tokens} tokens</p>",
             "</div>",
         ]
+        yield "\n".join(lines)
         for fd in self.file_dumps:
             path = html.escape(fd.path.as_posix())
-            lines.append("<details class='file-card'>")
+            lines = ["<details class='file-card'>"]
             lines.append(
                 "<summary>"
                 "<svg class='chevron' width='10' height='10'"
@@ -251,11 +287,29 @@ class Dump:
             lines.append(html.escape(fd.content))
             lines.append("</code></pre>")
             lines.append("</details>")
-        lines.append("</div></body></html>")
-        return "\n".join(lines)
+            yield "\n" + "\n".join(lines)
+        yield "\n</div></body></html>"
+
+    def as_html(self, repo_name: str) -> str:
+        return "".join(self.iter_html(repo_name))
+
 
+def _coalesce(chunks: Iterable[str], size: int = 1 << 16) -> Iterator[str]:
+    """Merge small *chunks* into pieces of roughly *size* characters."""
+    buf: List[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buf.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield "".join(buf)
+            buf = []
+            buffered = 0
+    if buf:
+        yield "".join(buf)
 
-def render(
+
+def render_iter(
     files: List[FileInfo],
     root: Path,
     *,
@@ -267,7 +321,12 @@ def render(
     tree_dirs_first: bool = True,
     max_token_size_multiplier: float = DEFAULT_MAX_TOKEN_SIZE_MULTIPLIER,
     contents_sort: str = DEFAULT_CONTENTS_SORT,
-) -> str:
+) -> Iterator[str]:
+    """Render *files* and return the dump as an iterator of text chunks.
+
+    Files are loaded and tokenized eagerly (errors raise here, before any
+    chunk is produced); only the output assembly is lazy.
+    """
     dump = Dump(
         files,
         root,
@@ -282,13 +341,23 @@ def render(
     resolved = root.resolve()
     repo_name = resolved.name or resolved.parent.name
     if fmt == "json":
-        return dump.as_json(repo_name)
+        return dump.iter_json(repo_name)
     if fmt == "html":
-        return dump.as_html(repo_name)
-    return dump.as_text(repo_name)
+        return dump.iter_html(repo_name)
+    return dump.iter_text(repo_name)
+
 
+def render(files: List[FileInfo], root: Path, **options: Any) -> str:
+    """Render *files* into one dump string — the joined :func:`render_iter`.
 
-def render_repo(
+    Takes exactly :func:`render_iter`'s keyword options.
+    """
+    # GUARDRAIL: options are forwarded, not re-declared — render_iter's signature
+    # is the single source of the defaults (and rejects unknown keys).
+    return "".join(render_iter(files, root, **options))
+
+
+def render_repo_iter(
     root: Path,
     *,
     include: Iterable[str] | None = None,
@@ -303,8 +372,8 @@ def render_repo(
     tree_sort_by: str = "name",
     tree_dirs_first: bool = True,
     contents_sort: str = DEFAULT_CONTENTS_SORT,
-) -> str:
-    """Collect files under *root* and render a dump.
+) -> Iterator[str]:
+    """Collect files under *root* and return the dump as text chunks.
 
     The single shared pipeline used by both the CLI and the programmatic API —
     collect+render plumbing lives here, not duplicated in cli.py/api.py.
@@ -319,7 +388,7 @@ def render_repo(
         max_size=max_size,
         binary_strict=binary_strict,
     )
-    return render(
+    return render_iter(
         files,
         root,
         max_tokens=max_tokens,
@@ -333,6 +402,15 @@ def render_repo(
     )
 
 
+def render_repo(root: Path, **options: Any) -> str:
+    """Collect files under *root* and render a dump (joined :func:`render_repo_iter`).
+
+    Takes exactly :func:`render_repo_iter`'s keyword options — see its signature
+    for the names and defaults; unknown keys raise TypeError.
+    """
+    return "".join(render_repo_iter(root, **options))
+
+
 # GUARDRAIL: defined at the END so it never swallows surrounding code — a big
 # triple-quoted constant in the middle of the module is a syntax accident waiting
 # to happen (it already happened once during refactor). Indentation is preserved
@@ -2,16 +2,105 @@
 
 from __future__ import annotations
 
+import functools
+import os
+from typing import Any, Iterator, List, Optional, Sequence
+
+
+# GUARDRAIL: tiktoken.get_encoding() rebuilds the BPE merge table — hundreds of
+# ms and megabytes per call — and used to run once PER FILE. Load it once.
+# A missing tiktoken is memoized too (None), so the import isn't retried per call.
+@functools.lru_cache(maxsize=1)
+def _get_encoder() -> Optional[Any]:
+    """Return the cl100k_base encoder, or None when it is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    # GUARDRAIL: get_encoding() downloads cl100k_base on first use, so it fails
+    # offline (or on a broken cache) even with tiktoken installed. Fall back to
+    # the estimate like a missing tiktoken does — and return, don't raise:
+    # lru_cache doesn't memoize exceptions, so a raise would retry every call.
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate used when tiktoken is not installed."""
+    # GUARDRAIL: was len(text)//4 — a fixed chars-per-token ratio that ignores
+    # word structure. Counting word and line breaks (two C-level str.count
+    # scans, no allocation) follows how BPE splits text at whitespace. But
+    # len//4 stays as the FLOOR: whitespace-free text (source maps, minified
+    # bundles) would otherwise count as ~1 token and slip past --max-tokens and
+    # the pareto filter, which exist to drop exactly those files. Always >= 1,
+    # like the old max(1, ...) — an empty file still "costs" a token.
+    return max(len(text) // 4, text.count(" ") + text.count("\n") + 1)
+
 
 # GUARDRAIL: total_tokens() was dead code (no callers) and dragged in the loader
-# dependency — removed. The tiktoken try/except fallback stays: tiktoken is an
-# optional dependency, len(text)//4 must keep working when it's not installed.
+# dependency — removed. The tiktoken fallback stays: tiktoken is an optional
+# dependency, _estimate_tokens must keep working when it's not installed.
 def approximate_tokens(text: str) -> int:
     """Return approximate token count of ``text``."""
-    try:
-        import tiktoken
+    enc = _get_encoder()
+    if enc is None:
+        return _estimate_tokens(text)
+    # GUARDRAIL: encode_ordinary, not encode — encode() raises ValueError on
+    # special-token text like "<|endoftext|>" (common in ML repos). The old
+    # `except Exception` hid that by silently falling back to an estimate; with the
+    # catch narrowed to ImportError, such files must still count as plain text.
+    return len(enc.encode_ordinary(text))
 
-        enc = tiktoken.get_encoding("cl100k_base")
-        return len(enc.encode(text))
-    except Exception:
-        return max(1, len(text) // 4)
+
+# GUARDRAIL: encode_ordinary_batch spins up a fresh ThreadPoolExecutor per call;
+# below this many texts the pool startup costs more than it saves, so small
+# repos are encoded inline.
+_MIN_PARALLEL_BATCH = 32
+
+# GUARDRAIL: a batch call returns EVERY text's token list at once (~36 bytes
+# per token as Python ints), so one call over the whole repo held all of its
+# tokens in memory. Texts are encoded in slices of about this many characters
+# (~1M tokens) and only the lengths are kept.
+_SLICE_CHARS = 1 << 22
+
+
+def _slices(texts: Sequence[str]) -> Iterator[Sequence[str]]:
+    """Yield consecutive slices of *texts* of about ``_SLICE_CHARS`` characters."""
+    start = 0
+    while start < len(texts):
+        end, chars = start, 0
+        while end < len(texts) and chars < _SLICE_CHARS:
+            chars += len(texts[end])
+            end += 1
+        yield texts[start:end]
+        start = end
+
+
+def approximate_tokens_batch(texts: Sequence[str]) -> List[int]:
+    """Return approximate token counts for ``texts`` (same order, one per text).
+
+    Equivalent to ``[approximate_tokens(t) for t in texts]``, but with tiktoken
+    installed texts are encoded in slices of about ``_SLICE_CHARS`` characters,
+    and a slice of ``_MIN_PARALLEL_BATCH`` or more texts goes through one
+    ``encode_ordinary_batch`` call.
+    """
+    # GUARDRAIL: per-file encode crossed the Python↔Rust boundary once per file
+    # and ran strictly serially. The batch call tokenizes on tiktoken's thread
+    # pool (the Rust BPE releases the GIL), so multi-core machines scale — which
+    # is also why there is no ProcessPoolExecutor here: threads already run the
+    # BPE in parallel, and processes would pickle every text and reload the
+    # encoder per worker.
+    enc = _get_encoder()
+    if enc is None:
+        return [_estimate_tokens(text) for text in texts]
+    num_threads = os.cpu_count() or 1
+    counts: List[int] = []
+    for batch in _slices(texts):
+        if len(batch) < _MIN_PARALLEL_BATCH:
+            counts.extend(len(enc.encode_ordinary(text)) for text in batch)
+        else:
+            encoded = enc.encode_ordinary_batch(list(batch), num_threads=num_threads)
+            counts.extend(len(tokens) for tokens in encoded)
+    return counts
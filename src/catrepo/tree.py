@@ -2,73 +2,60 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import functools
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from .walker import FileInfo
 
 
-@dataclass
+@dataclass(slots=True)
 class TreeNode:
     """A node in the tree structure."""
     
     name: str
-    path: Path
+    path: str  # relative, "/"-separated; "" for the root
     is_dir: bool
     size: int = 0
     tokens: int = 0
-    children: List['TreeNode'] = None
-    
-    def __post_init__(self):
-        if self.children is None:
-            self.children = []
+    children: List['TreeNode'] = field(default_factory=list)
 
 
-def _format_units(value: int, base: int, suffixes: Tuple[str, ...]) -> str:
-    """Format *value* in human-readable units — one ladder, two callers.
+def _format_units(value: int, unit_idx: int, base: int, suffixes: Tuple[str, ...]) -> str:
+    """Format *value* in unit number *unit_idx* (0 = plain) — one formatter, two callers.
 
     GUARDRAIL: _format_size and _format_tokens were two copies of the same
     threshold ladder (different bases/suffixes only); the merged version must
-    produce byte-identical output — the tree parity tests depend on it.
+    produce byte-identical output — the tree parity tests depend on it. The
+    unit is picked in O(1) by the callers (bit_length / digit count) instead
+    of a divide-and-compare cascade; the unit choice is identical because the
+    ladder also compared the unrounded quotient.
     """
-    if value < base:
+    if unit_idx <= 0:
         return f"{value}"
-    for suffix in suffixes:
-        value /= base
-        if value < base:
-            return f"{value:.1f}{suffix}"
-    return f"{value:.1f}{suffixes[-1]}"
+    unit_idx = min(unit_idx, len(suffixes))
+    return f"{value / base ** unit_idx:.1f}{suffixes[unit_idx - 1]}"
 
 
+# GUARDRAIL: memoized — directory totals and small file sizes repeat a lot
+# across a big tree, and the tree is rendered once per dump.
+@functools.lru_cache(maxsize=4096)
 def _format_size(size: int) -> str:
     """Format size in human-readable format (1024-based K/M/G)."""
-    return _format_units(size, 1024, ("K", "M", "G"))
+    return _format_units(size, (size.bit_length() - 1) // 10, 1024, ("K", "M", "G"))
 
 
+@functools.lru_cache(maxsize=4096)
 def _format_tokens(tokens: int) -> str:
     """Format token count in human-readable format (1000-based K/M/B)."""
-    return _format_units(tokens, 1000, ("K", "M", "B"))
+    return _format_units(tokens, (len(str(tokens)) - 1) // 3, 1000, ("K", "M", "B"))
 
 
 # GUARDRAIL: calc_size/sort/trim were closures nested inside build_tree — hoisted
-# to module level with explicit params (same logic, byte-identical tree output).
-def _calc_size(node: TreeNode) -> Tuple[int, int]:
-    """Calculate total size and tokens for a directory (recursive)."""
-    if not node.is_dir:
-        return node.size, node.tokens
-
-    total_size = 0
-    total_tokens = 0
-    for child in node.children:
-        s, t = _calc_size(child)
-        total_size += s
-        total_tokens += t
-    node.size = total_size
-    node.tokens = total_tokens
-    return total_size, total_tokens
-
-
+# to module level, then calc_size and trim were folded into the build itself
+# (sizes propagate on insertion, depth is capped at insertion) — one pass instead
+# of four full tree walks, byte-identical tree output.
 def _sort_key(node: TreeNode, sort_by: str):
     if sort_by == "size":
         return -node.size
@@ -78,30 +65,23 @@ def _sort_key(node: TreeNode, sort_by: str):
         return node.name.lower()
 
 
-def _sort_children(node: TreeNode, sort_by: str, dirs_first: bool) -> None:
-    """Recursively sort children (dirs first, then by *sort_by*)."""
-    if dirs_first:
-        dirs = [c for c in node.children if c.is_dir]
-        files_list = [c for c in node.children if not c.is_dir]
-        dirs.sort(key=lambda c: _sort_key(c, sort_by))
-        files_list.sort(key=lambda c: _sort_key(c, sort_by))
-        node.children = dirs + files_list
-    else:
-        node.children.sort(key=lambda c: _sort_key(c, sort_by))
+def _sort_children(root: TreeNode, sort_by: str, dirs_first: bool) -> None:
+    """Sort every directory's children (dirs first, then by *sort_by*).
 
-    for child in node.children:
-        if child.is_dir:
-            _sort_children(child, sort_by, dirs_first)
-
-
-def _trim_depth(node: TreeNode, depth: int, max_depth: int) -> None:
-    """Remove children beyond *max_depth* (recursive)."""
-    if depth >= max_depth:
-        node.children = []
-    else:
-        for child in node.children:
-            if child.is_dir:
-                _trim_depth(child, depth + 1, max_depth)
+    Iterative (explicit stack) — deep trees can't hit the recursion limit.
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if dirs_first:
+            dirs = [c for c in node.children if c.is_dir]
+            files_list = [c for c in node.children if not c.is_dir]
+            dirs.sort(key=lambda c: _sort_key(c, sort_by))
+            files_list.sort(key=lambda c: _sort_key(c, sort_by))
+            node.children = dirs + files_list
+        else:
+            node.children.sort(key=lambda c: _sort_key(c, sort_by))
+        stack.extend(c for c in node.children if c.is_dir)
 
 
 def build_tree(
@@ -137,50 +117,54 @@ def build_tree(
     # informational (rendering only uses name/size/tokens).
     root_node = TreeNode(
         name=root.name or str(root),
-        path=root,
+        path="",
         is_dir=True,
     )
-    dirs_by_path: Dict[Path, TreeNode] = {Path(): root_node}
+    dirs_by_path: Dict[str, TreeNode] = {"": root_node}
 
-    # Build tree structure
+    # Build tree structure — every file adds its size/tokens to each ancestor
+    # on the way down, so directory totals need no separate pass.
     for f in files:
+        parts = f.path.split("/")
+        tokens = f.size // 4  # Approximate — keep for parity
         node = root_node
-        rel = Path()
-        for i, part in enumerate(f.path.parts):
-            rel = rel / part
-            is_file = i == len(f.path.parts) - 1
-            if is_file:
+        node.size += f.size
+        node.tokens += tokens
+        key = ""
+        for depth, part in enumerate(parts[:-1], 1):
+            # GUARDRAIL: max_depth caps what's INSERTED, not what's counted —
+            # a directory at the depth limit still totals everything below it
+            # (same as the old calc-then-trim order).
+            if max_depth is not None and depth > max_depth:
+                break
+            key = f"{key}/{part}" if key else part
+            child = dirs_by_path.get(key)
+            if child is None:
+                child = TreeNode(
+                    name=part,
+                    path=key,
+                    is_dir=True,
+                )
+                dirs_by_path[key] = child
+                node.children.append(child)
+            child.size += f.size
+            child.tokens += tokens
+            node = child
+        else:
+            if max_depth is None or len(parts) <= max_depth:
                 node.children.append(
                     TreeNode(
-                        name=part,
-                        path=rel,
+                        name=parts[-1],
+                        path=f.path,
                         is_dir=False,
                         size=f.size,
-                        tokens=f.size // 4,  # Approximate — keep for parity
+                        tokens=tokens,
                     )
                 )
-            else:
-                child = dirs_by_path.get(rel)
-                if child is None:
-                    child = TreeNode(
-                        name=part,
-                        path=rel,
-                        is_dir=True,
-                    )
-                    dirs_by_path[rel] = child
-                    node.children.append(child)
-                node = child
 
-    # Calculate directory sizes and tokens
-    _calc_size(root_node)
-    
     # Sort children
     _sort_children(root_node, sort_by, dirs_first)
-    
-    # Apply max depth
-    if max_depth is not None:
-        _trim_depth(root_node, 0, max_depth)
-    
+
     return root_node
 
 
@@ -208,44 +192,29 @@ def render_tree(
     List[str]:
         Lines of the tree representation.
     """
-    lines = []
-    
-    # Connector
-    connector = "└── " if is_last else "├── "
-    
-    # Build the line
-    line_parts = [prefix + connector]
-    
-    # GUARDRAIL: the old code had two IDENTICAL if/elif size branches (one for dir,
-    # one for file) — collapsed to one `if show_size`. Tree output is byte-identical.
-    if show_size:
-        line_parts.append(f"[{_format_size(root.size):>10}] ")
-    
-    # Name
-    line_parts.append(root.name)
-    
-    # Token info for files (always shown — the --tree-tokens flag was removed;
-    # GUARDRAIL: show_tokens param dropped, it was always True from the only caller)
-    if not root.is_dir:
-        line_parts.append(f" ({_format_tokens(root.tokens)} tok)")
-    
-    lines.append("".join(line_parts))
-    
-    # Render children
-    if root.children:
-        # Update prefix for children
-        new_prefix = prefix + ("    " if is_last else "│   ")
-        
-        for i, child in enumerate(root.children):
-            child_is_last = (i == len(root.children) - 1)
-            child_lines = render_tree(
-                child,
-                prefix=new_prefix,
-                is_last=child_is_last,
-                show_size=show_size,
-            )
-            lines.extend(child_lines)
-    
+    # GUARDRAIL: iterative with ONE output list — the recursive version built a
+    # line_parts list per node and a child list per directory, then extended the
+    # parent's list level by level. Children are pushed in reverse so pop order
+    # is the same DFS order; output is byte-identical.
+    lines: List[str] = []
+    stack = [(root, prefix, is_last)]
+    while stack:
+        node, node_prefix, node_is_last = stack.pop()
+        connector = "└── " if node_is_last else "├── "
+        # GUARDRAIL: the old code had two IDENTICAL if/elif size branches (one for dir,
+        # one for file) — collapsed to one `if show_size`. Tree output is byte-identical.
+        size_str = f"[{_format_size(node.size):>10}] " if show_size else ""
+        # Token info for files (always shown — the --tree-tokens flag was removed;
+        # GUARDRAIL: show_tokens param dropped, it was always True from the only caller)
+        tok_str = "" if node.is_dir else f" ({_format_tokens(node.tokens)} tok)"
+        lines.append(f"{node_prefix}{connector}{size_str}{node.name}{tok_str}")
+
+        if node.children:
+            child_prefix = node_prefix + ("    " if node_is_last else "│   ")
+            last = len(node.children) - 1
+            for i in range(last, -1, -1):
+                stack.append((node.children[i], child_prefix, i == last))
+
     return lines
 
 
@@ -2,27 +2,105 @@
 
 from __future__ import annotations
 
+import codecs
 import mimetypes
+import os
 from pathlib import Path
 
 ASCII_WHITELIST = set(b"\t\n\r")
 
+# GUARDRAIL: extension fast path — BINARY_EXTS are rejected by name, without a
+# syscall or a mimetypes lookup. TEXT_EXTS only skip the mimetypes lookup: they
+# are still sniffed, because a UTF-16 notes.txt / export.sql is full of NULs and
+# must not be dumped (see the BOM note below). TEXT_EXTS also fixes real misses:
+# mimetypes maps .json/.xml/.sql to application/* and .rs to
+# application/rls-services+xml, so those sources used to be dropped as binary.
+TEXT_EXTS = frozenset({
+    ".py", ".pyi", ".pyx", ".md", ".rst", ".txt",
+    ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".xml",
+    ".js", ".mjs", ".cjs", ".ts", ".tsx", ".jsx", ".vue", ".svelte",
+    ".html", ".css", ".scss",
+    ".c", ".h", ".cc", ".cpp", ".hpp", ".rs", ".go", ".java", ".kt",
+    ".rb", ".php", ".swift", ".sh", ".bash", ".zsh", ".sql",
+})
+BINARY_EXTS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".tar", ".jar", ".whl",
+    ".exe", ".dll", ".so", ".dylib", ".a", ".o", ".pyc", ".pyo", ".class",
+    ".woff", ".woff2", ".ttf", ".otf", ".mp3", ".mp4", ".mov", ".wav",
+    ".sqlite", ".db", ".bin",
+})
+
+# GUARDRAIL: strict mode used to count non-text bytes with a Python generator
+# over the whole 8 KiB chunk — ~8k interpreter iterations per file. Deleting the
+# printable-ASCII + whitelist bytes with bytes.translate leaves exactly the
+# non-text bytes, counted in one C-level pass. Same predicate, same threshold.
+# Do NOT reach for numba/Cython/NumPy here: translate already runs the scan in
+# C over at most 8 KiB, and a JIT would add a heavy dependency plus compile
+# latency for no measurable gain — the cost per file is the open/read syscalls.
+_TEXT_BYTES = bytes(range(32, 127)) + bytes(sorted(ASCII_WHITELIST))
+
+
+# GUARDRAIL: O_NOATIME skips the atime inode write on cold walks, but Linux
+# refuses it (EPERM) for files the caller doesn't own — _read_head retries
+# without it. O_BINARY matters on Windows only (no CRLF translation).
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+_NOATIME = getattr(os, "O_NOATIME", 0)
+
+
+_SNIFF_SIZE = 8192
+_NUL_SCAN_SIZE = 65536
+
+
+def _read_head(path: Path, size: int) -> bytes:
+    """Return up to *size* leading bytes of *path* via a raw file descriptor.
+
+    GUARDRAIL: open(path, "rb") builds a full BufferedReader (plus its
+    finalizer) just to read one block; os.open/os.read skips all of that.
+    Kept as a helper so tests can patch the read in one place.
+    """
+    try:
+        fd = os.open(path, _OPEN_FLAGS | _NOATIME)
+    except PermissionError:
+        if not _NOATIME:
+            raise
+        fd = os.open(path, _OPEN_FLAGS)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
 
 def is_binary_path(path: Path, *, strict: bool = True) -> bool:
     """Return True if file looks binary."""
-    mime, _ = mimetypes.guess_type(path.as_posix())
-    if mime is not None and not mime.startswith("text"):
+    suffix = path.suffix.lower()
+    if suffix in BINARY_EXTS:
         return True
+    if suffix not in TEXT_EXTS:
+        mime, _ = mimetypes.guess_type(path.as_posix())
+        if mime is not None and not mime.startswith("text"):
+            return True
     try:
-        with open(path, "rb") as fh:
-            chunk = fh.read(8192)
-        if b"\0" in chunk:
+        # GUARDRAIL: the NUL check covers the first 64 KiB, the strict ratio
+        # only the first 8 KiB (unchanged). 8 KiB alone classified binaries with a
+        # text-looking header (archives with a long preamble, etc.) as text.
+        # A plain read, not mmap: `in` is the same C memchr scan either way,
+        # mmap setup costs more than a 64 KiB read, and a mapped file truncated
+        # mid-scan raises SIGBUS (kills the process) instead of a short read.
+        head = _read_head(path, _NUL_SCAN_SIZE)
+        if b"\0" in head:
             return True
+        chunk = head[:_SNIFF_SIZE]
+        # GUARDRAIL: a UTF-8 BOM declares text — non-English UTF-8 files are
+        # mostly >126 bytes and used to trip the 30% strict threshold. Only the
+        # UTF-8 BOM: UTF-16/32 files are full of NULs and load_text decodes
+        # UTF-8 only, so dumping them would be mojibake.
+        if chunk.startswith(codecs.BOM_UTF8):
+            return False
         if strict and chunk:
-            non_text = sum(
-                1 for b in chunk if not (32 <= b <= 126 or b in ASCII_WHITELIST)
-            )
-            if non_text / len(chunk) > 0.30:
+            non_text = len(chunk.translate(None, _TEXT_BYTES))
+            # Integer form of `non_text / len(chunk) > 0.30` — no float division.
+            if non_text * 10 > len(chunk) * 3:
                 return True
         return False
     except OSError:
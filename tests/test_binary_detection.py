@@ -0,0 +1,122 @@
+"""Tests for is_binary_path.
+
+Pins the contract:
+  1. known binary extensions are rejected by name, without opening; known
+     text extensions skip mimetypes but are still sniffed (UTF-16 has NULs)
+  2. otherwise: a NUL byte in the first 64 KiB means binary
+  3. strict mode rejects >30% non-text bytes; non-strict only checks NULs
+  4. a UTF-8 BOM means text, even when most bytes are non-ASCII
+  5. unreadable paths count as binary (never dumped)
+  6. a refused O_NOATIME open falls back to a plain open
+
+Sniffing fixtures use extensions mimetypes doesn't know (.log, .dat) so they
+exercise the byte checks rather than the extension fast path.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Ensure the src package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from catrepo import utils
+from catrepo.utils import is_binary_path
+
+
+class TestIsBinaryPath(unittest.TestCase):
+    def setUp(self) -> None:
+        # GUARDRAIL: never use /tmp for fixtures — scratch dir under the repo
+        # root, always cleaned up (even on failure).
+        self.root = Path(__file__).resolve().parents[1] / ".tmp_binary"
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def _file(self, name: str, data: bytes) -> Path:
+        path = self.root / name
+        path.write_bytes(data)
+        return path
+
+    def test_plain_text(self) -> None:
+        self.assertFalse(is_binary_path(self._file("a.log", b"hello\n\tworld\r\n")))
+
+    def test_empty_file_is_text(self) -> None:
+        self.assertFalse(is_binary_path(self._file("empty.log", b"")))
+
+    def test_nul_byte_is_binary(self) -> None:
+        path = self._file("a.dat", b"abc\x00def")
+        self.assertTrue(is_binary_path(path))
+        self.assertTrue(is_binary_path(path, strict=False))
+
+    def test_nul_past_first_block_is_binary(self) -> None:
+        path = self._file("late.dat", b"a" * 20000 + b"\x00" + b"a" * 100)
+        self.assertTrue(is_binary_path(path, strict=False))
+
+    def test_strict_threshold(self) -> None:
+        # 3 of 10 bytes non-text is exactly 30% — not over the threshold.
+        self.assertFalse(is_binary_path(self._file("at.log", b"\x01\x02\x03abcdefg")))
+        self.assertTrue(is_binary_path(self._file("over.log", b"\x01\x02\x03\x04abcdef")))
+
+    def test_non_strict_ignores_ratio(self) -> None:
+        path = self._file("ctl.log", b"\x01\x02\x03\x04abcdef")
+        self.assertFalse(is_binary_path(path, strict=False))
+
+    def test_utf8_bom_is_text(self) -> None:
+        data = "\ufeff" + "привет мир\n" * 20
+        path = self._file("ru.log", data.encode("utf-8"))
+        self.assertFalse(is_binary_path(path))
+        # Same content without the BOM is over the strict threshold.
+        path = self._file("ru_nobom.log", data[1:].encode("utf-8"))
+        self.assertTrue(is_binary_path(path))
+
+    def test_binary_extension_skips_the_read(self) -> None:
+        def no_read(path: Path, size: int) -> bytes:
+            raise AssertionError(f"{path} should not be opened")
+
+        image = self._file("logo.PNG", b"not really a png")
+        with mock.patch.object(utils, "_read_head", no_read):
+            self.assertTrue(is_binary_path(image))
+
+    def test_text_extension_skips_mimetypes(self) -> None:
+        # GUARDRAIL: .json is application/json to mimetypes — it used to be
+        # dropped as binary; the extension whitelist keeps it.
+        text = self._file("data.json", b"{}")
+        with mock.patch.object(utils.mimetypes, "guess_type", side_effect=AssertionError):
+            self.assertFalse(is_binary_path(text))
+
+    def test_utf16_with_text_extension_is_binary(self) -> None:
+        for name in ("notes.txt", "export.sql"):
+            path = self._file(name, "select 1;\n".encode("utf-16"))
+            self.assertTrue(is_binary_path(path, strict=False), name)
+
+    def test_unknown_extension_is_sniffed(self) -> None:
+        self.assertFalse(is_binary_path(self._file("Makefile", b"all:\n\ttrue\n")))
+        self.assertTrue(is_binary_path(self._file("blob.xyz", b"\x00\x01")))
+
+    def test_missing_file_is_binary(self) -> None:
+        self.assertTrue(is_binary_path(self.root / "missing.log"))
+
+    @unittest.skipUnless(utils._NOATIME, "O_NOATIME is Linux-only")
+    def test_noatime_refused_falls_back(self) -> None:
+        # GUARDRAIL: Linux rejects O_NOATIME (EPERM) on files the caller doesn't
+        # own — the sniff must retry without it, not report the file as binary.
+        path = self._file("other_owner.log", b"hello\n")
+        real_open = os.open
+
+        def fake_open(p, flags, *args):
+            if flags & utils._NOATIME:
+                raise PermissionError(1, "Operation not permitted")
+            return real_open(p, flags, *args)
+
+        with mock.patch.object(utils.os, "open", fake_open):
+            self.assertFalse(is_binary_path(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Tests for streamed rendering (render_repo_iter).
+
+Pins the contract:
+  1. streamed json is byte-identical to json.dumps(obj, indent=2)
+  2. text output yields one chunk per file after the header/tree chunk
+  3. option errors raise before anything is streamed
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Ensure the src package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from catrepo import renderer
+from catrepo.renderer import render_repo_iter
+
+
+class TestRenderStream(unittest.TestCase):
+    def setUp(self) -> None:
+        # GUARDRAIL: never use /tmp for fixtures — scratch dir under the repo
+        # root, always cleaned up (even on failure).
+        self.root = Path(__file__).resolve().parents[1] / ".tmp_render_stream"
+        shutil.rmtree(self.root, ignore_errors=True)
+        (self.root / "pkg").mkdir(parents=True)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        (self.root / "main.py").write_text("import pkg.util\n")
+        (self.root / "pkg" / "util.py").write_text("X = '<b>&</b>'\n")
+        (self.root / "README.md").write_text("# readme\n")
+
+    def test_json_stream_matches_json_dumps(self) -> None:
+        # GUARDRAIL: the streamed json must be byte-identical to what the old
+        # json.dumps(obj, indent=2) produced — downstream tools diff these dumps.
+        out = "".join(render_repo_iter(self.root, fmt="json", contents_sort="path"))
+        obj = json.loads(out)
+        self.assertEqual(out, json.dumps(obj, indent=2))
+        self.assertEqual(
+            [f["path"] for f in obj["files"]], ["README.md", "main.py", "pkg/util.py"]
+        )
+
+    def test_text_yields_one_chunk_per_file(self) -> None:
+        chunks = list(render_repo_iter(self.root, contents_sort="path"))
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith("# Catrepo dump"))
+        self.assertEqual(chunks[1], "\n### README.md\n# readme\n\n")
+
+    def test_unknown_option_raises_before_streaming(self) -> None:
+        # The call itself raises — no iterator is ever handed out.
+        with self.assertRaises(TypeError):
+            render_repo_iter(self.root, no_such_option=True)
+
+    def test_tokenize_error_raises_before_streaming(self) -> None:
+        # GUARDRAIL: the CLI opens --outfile only after render_repo_iter returns,
+        # so load/tokenize errors must surface from the call, not mid-stream.
+        boom = mock.Mock(side_effect=RuntimeError("boom"))
+        with mock.patch.object(renderer, "approximate_tokens_batch", boom):
+            with self.assertRaises(RuntimeError):
+                render_repo_iter(self.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for token counting (tiktoken is faked — it's an optional dependency).
+
+Pins the contract:
+  1. without tiktoken, counts are spaces + newlines + 1 (never 0), floored at
+     len // 4 so whitespace-free text still scales with its length
+  2. the batch helper returns the same counts as per-text calls, in order
+  3. an encoder that fails to load falls back to the estimate, once (memoized)
+  4. with an encoder, small batches encode inline and large ones in ONE
+     parallel batch call per slice of about _SLICE_CHARS characters
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Ensure the src package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from catrepo import tokenizer
+
+
+class TestFallbackEstimate(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(tokenizer, "_get_encoder", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_counts_word_and_line_breaks(self) -> None:
+        # 6 spaces (4 of them indentation) + 2 newlines + 1
+        self.assertEqual(tokenizer.approximate_tokens("def f(x):\n    return x\n"), 9)
+
+    def test_whitespace_free_text_scales_with_length(self) -> None:
+        # A minified bundle / source map: one huge line, no spaces.
+        self.assertEqual(tokenizer.approximate_tokens("x" * 4000), 1000)
+
+    def test_empty_text_is_one_token(self) -> None:
+        self.assertEqual(tokenizer.approximate_tokens(""), 1)
+
+    def test_batch_matches_single(self) -> None:
+        texts = ["a b c", "", "one\ntwo\nthree\n"]
+        self.assertEqual(
+            tokenizer.approximate_tokens_batch(texts),
+            [tokenizer.approximate_tokens(t) for t in texts],
+        )
+
+
+class TestEncoderLoadFailure(unittest.TestCase):
+    def test_failed_load_falls_back_and_is_memoized(self) -> None:
+        # get_encoding() downloads cl100k_base on first use — offline it raises.
+        fake = types.ModuleType("tiktoken")
+        fake.get_encoding = mock.Mock(side_effect=ConnectionError("offline"))
+        tokenizer._get_encoder.cache_clear()
+        self.addCleanup(tokenizer._get_encoder.cache_clear)
+        with mock.patch.dict(sys.modules, {"tiktoken": fake}):
+            self.assertEqual(tokenizer.approximate_tokens("a b"), 2)
+            self.assertEqual(tokenizer.approximate_tokens("a b"), 2)
+        fake.get_encoding.assert_called_once()
+
+
+class _FakeEncoder:
+    """Stands in for a tiktoken Encoding: one "token" per character."""
+
+    def __init__(self) -> None:
+        self.batch_calls = 0
+
+    def encode_ordinary(self, text: str) -> list:
+        return list(text)
+
+    def encode_ordinary_batch(self, texts: list, *, num_threads: int) -> list:
+        self.batch_calls += 1
+        return [list(text) for text in texts]
+
+
+class TestBatchEncoding(unittest.TestCase):
+    def _run(self, texts: list) -> tuple:
+        enc = _FakeEncoder()
+        with mock.patch.object(tokenizer, "_get_encoder", return_value=enc):
+            return tokenizer.approximate_tokens_batch(texts), enc.batch_calls
+
+    def test_small_batch_encodes_inline(self) -> None:
+        counts, batch_calls = self._run(["ab", "", "abc"])
+        self.assertEqual((counts, batch_calls), ([2, 0, 3], 0))
+
+    def test_large_batch_uses_one_parallel_call(self) -> None:
+        texts = ["x" * i for i in range(tokenizer._MIN_PARALLEL_BATCH)]
+        counts, batch_calls = self._run(texts)
+        self.assertEqual((counts, batch_calls), (list(range(len(texts))), 1))
+
+    def test_large_batch_is_encoded_in_bounded_slices(self) -> None:
+        texts = ["x" * 10] * (tokenizer._MIN_PARALLEL_BATCH * 3)
+        with mock.patch.object(tokenizer, "_SLICE_CHARS", 10 * tokenizer._MIN_PARALLEL_BATCH):
+            counts, batch_calls = self._run(texts)
+        self.assertEqual((counts, batch_calls), ([10] * len(texts), 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
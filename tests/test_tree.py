@@ -0,0 +1,77 @@
+"""Tests for the tree view builder.
+
+Pins the contract:
+  1. directory size/tokens are the totals of every file below them
+  2. --tree-depth hides deeper nodes but never changes the totals shown
+  3. dirs-first ordering, then the requested sort key
+"""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+# Ensure the src package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from catrepo.tree import build_tree, generate_tree_view
+from catrepo.walker import FileInfo
+
+FILES = [
+    FileInfo(path="src/pkg/core.py", size=4000, mtime=1.0),
+    FileInfo(path="src/pkg/util.py", size=400, mtime=1.0),
+    FileInfo(path="src/main.py", size=800, mtime=1.0),
+    FileInfo(path="README.md", size=40, mtime=1.0),
+]
+
+
+class TestBuildTree(unittest.TestCase):
+    def test_directory_totals(self) -> None:
+        root = build_tree(FILES, Path("repo"))
+        self.assertEqual((root.size, root.tokens), (5240, 1310))
+        src = root.children[0]
+        self.assertEqual((src.name, src.size, src.tokens), ("src", 5200, 1300))
+
+    def test_depth_limit_keeps_totals(self) -> None:
+        root = build_tree(FILES, Path("repo"), max_depth=1)
+        src = root.children[0]
+        # GUARDRAIL: the depth cap hides src/'s children but src/ still totals
+        # everything below it — trimming must never change the numbers shown.
+        self.assertEqual(src.children, [])
+        self.assertEqual((src.size, src.tokens), (5200, 1300))
+        self.assertEqual([c.name for c in root.children], ["src", "README.md"])
+
+    def test_depth_zero_shows_root_only(self) -> None:
+        root = build_tree(FILES, Path("repo"), max_depth=0)
+        self.assertEqual(root.children, [])
+        self.assertEqual(root.size, 5240)
+
+    def test_sort_by_size_files_first(self) -> None:
+        root = build_tree(FILES, Path("repo"), sort_by="size", dirs_first=False)
+        pkg = root.children[0].children[0]
+        self.assertEqual([c.name for c in pkg.children], ["core.py", "util.py"])
+        self.assertEqual([c.name for c in root.children], ["src", "README.md"])
+
+
+class TestGenerateTreeView(unittest.TestCase):
+    def test_rendered_view(self) -> None:
+        view = generate_tree_view(FILES, Path("repo"), show_size=True)
+        self.assertEqual(
+            view.splitlines(),
+            [
+                "└── [      5.1K] repo",
+                "    ├── [      5.1K] src",
+                "    │   ├── [      4.3K] pkg",
+                "    │   │   ├── [      3.9K] core.py (1.0K tok)",
+                "    │   │   └── [       400] util.py (100 tok)",
+                "    │   └── [       800] main.py (200 tok)",
+                "    └── [        40] README.md (10 tok)",
+                "",
+                "2 directories, 4 files",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
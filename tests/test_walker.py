@@ -0,0 +1,104 @@
+"""Tests for collect_files directory pruning.
+
+Pins the contract:
+  1. ALWAYS_PRUNED_DIRS (.git, node_modules, caches) are skipped even
+     without a .gitignore entry
+  2. virtualenvs are recognised by their pyvenv.cfg, not by name — a plain
+     venv/ package is kept
+  3. an --include pattern naming a pruned directory opts it back in
+  4. gitignored directories are pruned before they are entered — nothing
+     under them (their own .gitignore included) leaks into the dump
+  5. parsed .gitignore files are cached across calls, but an edit is seen
+     on the next call; a file modified too recently to trust its timestamp
+     is never cached
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Ensure the src package is importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from catrepo import walker
+from catrepo.walker import collect_files
+
+
+class TestDirectoryPruning(unittest.TestCase):
+    def setUp(self) -> None:
+        # GUARDRAIL: never use /tmp for fixtures — scratch dir under the repo
+        # root, always cleaned up (even on failure).
+        self.root = Path(__file__).resolve().parents[1] / ".tmp_walker"
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def _write(self, rel: str, text: str = "x\n") -> None:
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def _paths(self, **kwargs) -> list:
+        return [f.path for f in collect_files(self.root, **kwargs)]
+
+    def test_always_pruned_dirs_skipped_without_gitignore(self) -> None:
+        self._write("src/app.py")
+        self._write("node_modules/pkg/index.js")
+        self._write("src/__pycache__/app.txt")
+        self._write(".git/HEAD")
+        self.assertEqual(self._paths(), ["src/app.py"])
+
+    def test_virtualenv_detected_by_marker_not_name(self) -> None:
+        self._write("env/pyvenv.cfg", "home = /usr/bin\n")
+        self._write("env/lib/site.py")
+        self._write("venv/__init__.py")
+        self.assertEqual(self._paths(), ["venv/__init__.py"])
+        self.assertEqual(
+            self._paths(include=["env/"]), ["env/lib/site.py", "env/pyvenv.cfg"]
+        )
+
+    def test_include_opts_pruned_dir_back_in(self) -> None:
+        self._write("src/app.py")
+        self._write("node_modules/pkg/index.js")
+        self.assertEqual(
+            self._paths(include=["node_modules/"]), ["node_modules/pkg/index.js"]
+        )
+
+    def test_gitignored_dir_pruned_before_its_gitignore_is_read(self) -> None:
+        self._write(".gitignore", "build/\n")
+        self._write("build/.gitignore", "*.tmp\n")
+        self._write("build/out.js")
+        self._write("main.py")
+        self.assertEqual(self._paths(), [".gitignore", "main.py"])
+
+    def test_edited_gitignore_invalidates_cache(self) -> None:
+        self._write(".gitignore", "*.log\n")
+        self._write("a.log")
+        self._write("b.tmp")
+        self.assertEqual(self._paths(), [".gitignore", "b.tmp"])
+        # GUARDRAIL: parsed .gitignore files are cached across calls — an edit
+        # (new mtime/size) must be picked up by the very next collect_files.
+        self._write(".gitignore", "*.tmp\n")
+        self.assertEqual(self._paths(), [".gitignore", "a.log"])
+
+    def test_recently_modified_gitignore_is_not_cached(self) -> None:
+        # GUARDRAIL: a same-size edit within the mtime granularity would keep
+        # the stamp unchanged — only files older than the racy window are cached.
+        gitignore = self.root / ".gitignore"
+        self._write(".gitignore", "*.log\n")
+        key = os.path.abspath(gitignore)
+        self._paths()
+        self.assertNotIn(key, walker._GITIGNORE_CACHE)
+        old = time.time() - 60
+        os.utime(gitignore, (old, old))
+        self._paths()
+        self.assertIn(key, walker._GITIGNORE_CACHE)
+
+
+if __name__ == "__main__":
+    unittest.main()